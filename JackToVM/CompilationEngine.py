@@ -2,16 +2,35 @@ class CompilationEngine:
     """Gets input from a JackTokenizer and emits its parsed structure into an
     output stream.
     """
+    # fixed attribute slots, as every method reads them many times
+    __slots__ = ("__input_tokenizer", "__output_vm_writer", "__symbol_table",
+                 "__vm_push", "__vm_pop", "__vm_arithmetic", "__vm_label",
+                 "__vm_goto", "__vm_if", "__vm_call", "__vm_function",
+                 "__vm_return", "__vm_string_constant", "__class_name",
+                 "__qualified_names", "__peek", "__statements_dict",
+                 "__binary_op_dict")
     # jack language and vm related
     __UNARY_OP_DICT = {'-': "neg", '~': "not", '^': "shiftleft",
                        '#': "shiftright"}
     __CALL_BINARY_OP_DICT = {'*': "Math.multiply", '/': "Math.divide"}
     __ARITHMETIC_BINARY_OP_DICT = {'+': "add", '-': "sub", '&': "and",
                                    '|': "or", '<': "lt", '>': "gt", '=': "eq"}
-    __KEYWORD_CONSTANT = {"true", "false", "null", "this"}
-    __VAR_DICT1 = {"var": "local", "arg": "argument"}
-    __VAR_DICT2 = {"field": "this", "static": "static"}
+    __KEYWORD_CONSTANT = frozenset({"true", "false", "null", "this"})
+    __CLASS_VAR_KINDS = frozenset({"static", "field"})
+    __SUBROUTINE_KINDS = frozenset({"constructor", "method", "function"})
+    __BINARY_OP_VALUES = frozenset(__CALL_BINARY_OP_DICT) | frozenset(
+        __ARITHMETIC_BINARY_OP_DICT)
+    # tokens an expression can start with
+    __CONSTANT_TYPES = frozenset({"integerConstant", "stringConstant"})
+    __TERM_START_TYPES = __CONSTANT_TYPES | {"identifier"}
+    __TERM_START_VALUES = frozenset({'('}) | __KEYWORD_CONSTANT | frozenset(
+        __UNARY_OP_DICT)
+    # the kind of a variable also determines its scope
+    __KIND_TO_SEGMENT = {"var": "local", "arg": "argument", "field": "this",
+                         "static": "static"}
     __ARGS = 2
+    # control flow labels, by (prefix, counter)
+    __LABELS = {}
 
     def __init__(self, input_stream: "JackTokenizer",
                  output_stream: "VMWriter", symbol_table: "SymbolTable") -> None:
@@ -24,13 +43,36 @@ class CompilationEngine:
         self.__input_tokenizer = input_stream
         self.__output_vm_writer = output_stream
         self.__symbol_table = symbol_table
+        # bound vm writer methods, to skip the writer lookup on every command
+        self.__vm_push = output_stream.write_push
+        self.__vm_pop = output_stream.write_pop
+        self.__vm_arithmetic = output_stream.write_arithmetic
+        self.__vm_label = output_stream.write_label
+        self.__vm_goto = output_stream.write_goto
+        self.__vm_if = output_stream.write_if
+        self.__vm_call = output_stream.write_call
+        self.__vm_function = output_stream.write_function
+        self.__vm_return = output_stream.write_return
+        self.__vm_string_constant = output_stream.write_string_constant
         self.__class_name = ""
+        # "class.subroutine" names, by (class, subroutine)
+        self.__qualified_names = {}
+        # the next token, refreshed on every advance
+        self.__peek = self.__input_tokenizer.next_token_tuple()
         # dict of statements and their correspondant compile methods
         self.__statements_dict = {"do": self.__compile_do,
                                   "let": self.__compile_let,
                                   "while": self.__compile_while,
                                   "return": self.__compile_return,
                                   "if": self.__compile_if}
+        # dict of binary operators and the vm writer call each compiles to
+        self.__binary_op_dict = {
+            op: (output_stream.write_call, (name, CompilationEngine.__ARGS))
+            for op, name in CompilationEngine.__CALL_BINARY_OP_DICT.items()}
+        self.__binary_op_dict.update(
+            (op, (output_stream.write_arithmetic, (command,)))
+            for op, command in
+            CompilationEngine.__ARITHMETIC_BINARY_OP_DICT.items())
 
     def compile_class(self) -> None:
         """
@@ -42,32 +84,28 @@ class CompilationEngine:
         self.__class_name = self.__advance()
         # {
         self.__advance()
-        while self.__next_token_value_in({"static", "field"}):
+        while self.__next_token_value_in(CompilationEngine.__CLASS_VAR_KINDS):
             self.__compile_class_var_dec()
-        while self.__next_token_value_in({"constructor", "method", "function"}):
+        while self.__next_token_value_in(CompilationEngine.__SUBROUTINE_KINDS):
             self.__compile_subroutine()
         # }
         self.__advance()
+        self.__output_vm_writer.flush()
 
     def __compile_class_var_dec(self) -> None:
         """
         Compiles a static declaration or a field declaration.
         """
-        # static or field -> var type -> var name
+        # static or field -> var type
         kind = self.__advance()
         type = self.__advance()
-        name = self.__advance()
-        # add entry to symbol table using inputs
-        self.__symbol_table.define(name, type, kind)
-        while self.__next_token_value_in({','}):
-            # ,
-            self.__advance()
-            # var name
-            name = self.__advance()
-            # add entry to symbol table
-            self.__symbol_table.define(name, type, kind)
-        # ;
-        self.__advance()
+        define = self.__symbol_table.define
+        while True:
+            # var name, add entry to symbol table
+            define(self.__advance(), type, kind)
+            # , or ;
+            if self.__advance() == ';':
+                break
 
     def __compile_subroutine(self) -> None:
         """
@@ -82,7 +120,7 @@ class CompilationEngine:
         # subroutine's name
         sub_name = self.__advance()
         # get new or subroutine's name
-        cur_name = "{}.{}".format(self.__class_name, sub_name)
+        cur_name = self.__qualify(self.__class_name, sub_name)
         # start the new subroutine and update current symbol table
         self.__symbol_table.start_subroutine(cur_name)
         self.__symbol_table.set_cur_level_symbol_table(cur_name)
@@ -98,43 +136,46 @@ class CompilationEngine:
         Compiles a (possibly empty) parameter list, not including the
         enclosing "()".
         """
+        define = self.__symbol_table.define
         if function_type == "method":
-            self.__symbol_table.define("this", "self", "arg")
-        while not self.__next_token_value_in({')'}):
-            # parameter type and name
+            define("this", "self", "arg")
+        if self.__peek[1] == ')':
+            return
+        while True:
+            # parameter type and name, add entry to symbol table
             type = self.__advance()
-            name = self.__advance()
-            # add entry to symbol table
-            self.__symbol_table.define(name, type, "arg")
-            if self.__next_token_value_in({','}):
-                # ,
-                self.__advance()
+            define(self.__advance(), type, "arg")
+            if self.__peek[1] != ',':
+                break
+            # ,
+            self.__advance()
 
     def __compile_var_dec(self) -> None:
         """
         Compiles a var declaration.
         """
-        # variable declaration's: var -> var type -> var name
+        # variable declaration's: var -> var type
         kind = self.__advance()
         type = self.__advance()
-        name = self.__advance()
-        self.__symbol_table.define(name, type, kind)
-        while self.__next_token_value_in({','}):
-            # ,
-            self.__advance()
+        define = self.__symbol_table.define
+        while True:
             # var name
-            name = self.__advance()
-            self.__symbol_table.define(name, type, kind)
-        # ;
-        self.__advance()
+            define(self.__advance(), type, kind)
+            # , or ;
+            if self.__advance() == ';':
+                break
 
     def __compile_statements(self) -> None:
         """
         Compiles a sequence of statements, not including the enclosing "{}".
         """
-        while self.__next_token_value_in(self.__statements_dict.keys()):
-            next_token_value = self.__input_tokenizer.next_token_tuple()[1]
-            self.__statements_dict[next_token_value]()
+        statements_dict = self.__statements_dict
+        # a single lookup both tests for a statement and finds its method
+        while True:
+            compile_method = statements_dict.get(self.__peek[1])
+            if compile_method is None:
+                break
+            compile_method()
 
     def __compile_do(self) -> None:
         """
@@ -144,7 +185,7 @@ class CompilationEngine:
         self.__advance()
         self.__compile_subroutine_call()
         # dump redundant return value
-        self.__output_vm_writer.write_pop("temp", 0)
+        self.__vm_pop("temp", 0)
         # ;
         self.__advance()
 
@@ -162,10 +203,7 @@ class CompilationEngine:
         self.__advance()
         self.__compile_expression()
         if is_array:
-            self.__output_vm_writer.write_pop("temp", 0)
-            self.__output_vm_writer.write_pop("pointer", 1)
-            self.__output_vm_writer.write_push("temp", 0)
-            self.__output_vm_writer.write_pop("that", 0)
+            self.__write_array_store()
         else:
             self.__write_pop(name)
         # ;
@@ -177,21 +215,21 @@ class CompilationEngine:
         """
         while_counter = self.__symbol_table.get_while_counter()
         self.__symbol_table.increment_while_counter()
-        start_label = "WHILE_START{}".format(while_counter)
-        end_label = "WHILE_END{}".format(while_counter)
-        self.__output_vm_writer.write_label(start_label)
+        start_label = self.__label("WHILE_START", while_counter)
+        end_label = self.__label("WHILE_END", while_counter)
+        self.__vm_label(start_label)
         # while -> (
         self.__advance()
         self.__advance()
         self.__compile_expression()
-        self.__output_vm_writer.write_arithmetic("not")
-        self.__output_vm_writer.write_if(end_label)
+        self.__vm_arithmetic("not")
+        self.__vm_if(end_label)
         # ) -> {
         self.__advance()
         self.__advance()
         self.__compile_statements()
-        self.__output_vm_writer.write_goto(start_label)
-        self.__output_vm_writer.write_label(end_label)
+        self.__vm_goto(start_label)
+        self.__vm_label(end_label)
         # }
         self.__advance()
 
@@ -201,17 +239,13 @@ class CompilationEngine:
         """
         # return
         self.__advance()
-        redundant_return = True
-        while (self.__next_token_type_in({"integerConstant", "stringConstant",
-                                          "identifier"})) or (
-                self.__next_token_value_in({'('}.union(
-                    CompilationEngine.__KEYWORD_CONSTANT,
-                    set(CompilationEngine.__UNARY_OP_DICT.keys())))):
-            redundant_return = False
+        # at most one expression before the ;
+        if self.__next_token_starts_term():
             self.__compile_expression()
-        if redundant_return:
-            self.__output_vm_writer.write_push("constant", 0)
-        self.__output_vm_writer.write_return()
+        else:
+            # redundant return value
+            self.__vm_push("constant", 0)
+        self.__vm_return()
         # ;
         self.__advance()
 
@@ -227,11 +261,11 @@ class CompilationEngine:
         self.__advance()
         if_counter = self.__symbol_table.get_if_counter()
         self.__symbol_table.increment_if_counter()
-        if_true_label = "IF_START{}".format(if_counter)
-        if_false_label = "ELSE{}".format(if_counter)
-        self.__output_vm_writer.write_if(if_true_label)
-        self.__output_vm_writer.write_goto(if_false_label)
-        self.__output_vm_writer.write_label(if_true_label)
+        if_true_label = self.__label("IF_START", if_counter)
+        if_false_label = self.__label("ELSE", if_counter)
+        self.__vm_if(if_true_label)
+        self.__vm_goto(if_false_label)
+        self.__vm_label(if_true_label)
         # {
         self.__advance()
         self.__compile_statements()
@@ -240,38 +274,69 @@ class CompilationEngine:
         self.__write_if_else(if_counter, if_false_label)
 
     def __write_if_else(self, if_counter, if_false_label):
-        if_end_label = "IF_END{}".format(if_counter)
-        if self.__next_token_value_in({"else"}):
-            self.__output_vm_writer.write_goto(if_end_label)
-            self.__output_vm_writer.write_label(if_false_label)
+        if_end_label = self.__label("IF_END", if_counter)
+        if self.__peek[1] == "else":
+            self.__vm_goto(if_end_label)
+            self.__vm_label(if_false_label)
             # else -> {
             self.__advance()
             self.__advance()
             self.__compile_statements()
             # }
             self.__advance()
-            self.__output_vm_writer.write_label(if_end_label)
+            self.__vm_label(if_end_label)
         else:
-            self.__output_vm_writer.write_label(if_false_label)
+            self.__vm_label(if_false_label)
 
     def __compile_expression(self) -> None:
         """
         Compiles an expression.
+        Unary operations and parenthesized sub-expressions are kept on an
+        explicit stack instead of being compiled recursively. Jack binary
+        operations have no precedence, so each one is written as soon as its
+        right operand is compiled.
         """
-        self.__compile_term()
-        while self.__next_token_value_in(
-                set(CompilationEngine.__CALL_BINARY_OP_DICT.keys()).union(
-                    set(CompilationEngine.__ARITHMETIC_BINARY_OP_DICT.keys()))):
-            op = self.__advance()
-            # operation expression
-            self.__compile_term()
-            if op in CompilationEngine.__CALL_BINARY_OP_DICT.keys():
-                self.__output_vm_writer.write_call(
-                    CompilationEngine.__CALL_BINARY_OP_DICT[op],
-                    CompilationEngine.__ARGS)
-            elif op in CompilationEngine.__ARITHMETIC_BINARY_OP_DICT.keys():
-                self.__output_vm_writer.write_arithmetic(
-                    CompilationEngine.__ARITHMETIC_BINARY_OP_DICT[op])
+        advance = self.__advance
+        compile_term = self.__compile_term
+        vm_arithmetic = self.__vm_arithmetic
+        unary_op_dict = CompilationEngine.__UNARY_OP_DICT
+        binary_op_values = CompilationEngine.__BINARY_OP_VALUES
+        binary_op_dict = self.__binary_op_dict
+        # for every open '(': the binary and unary operations waiting for
+        # the parenthesized sub-expression to be compiled
+        enclosing = []
+        binary_op = None
+        while True:
+            unary_ops = []
+            while self.__peek[0] == "symbol":
+                if self.__peek[1] in unary_op_dict:
+                    # unary operation expression
+                    unary_ops.append(advance())
+                elif self.__peek[1] == '(':
+                    # (
+                    advance()
+                    enclosing.append((binary_op, unary_ops))
+                    binary_op = None
+                    unary_ops = []
+                else:
+                    break
+            compile_term()
+            while True:
+                # the innermost unary operation applies first
+                for op in reversed(unary_ops):
+                    vm_arithmetic(unary_op_dict[op])
+                if binary_op is not None:
+                    write_op, args = binary_op_dict[binary_op]
+                    write_op(*args)
+                if self.__peek[1] in binary_op_values:
+                    # operation expression
+                    binary_op = advance()
+                    break
+                if not enclosing:
+                    return
+                # )
+                advance()
+                binary_op, unary_ops = enclosing.pop()
 
     def __compile_term(self) -> None:
         """
@@ -283,38 +348,26 @@ class CompilationEngine:
         A single look-ahead token, which may be one of '[', '(', or '.'
         suffices to distinguish between the three possibilities. Any other
         token is not part of this term and should not be advanced over.
+        Unary operations and parenthesized expressions are handled by
+        __compile_expression.
         """
-        if (self.__next_token_type_in({"integerConstant", "stringConstant"})) or (
-                self.__next_token_value_in(CompilationEngine.__KEYWORD_CONSTANT)):
+        token_type, token_value = self.__peek
+        if (token_type in CompilationEngine.__CONSTANT_TYPES) or (
+                token_value in CompilationEngine.__KEYWORD_CONSTANT):
             self.__write_integer_string_keyword_constant()
-        elif self.__next_token_type_in({"identifier"}):
+        elif token_type == "identifier":
             self.__write_identifier_term()
-        elif self.__next_token_value_in(CompilationEngine.__UNARY_OP_DICT.keys()):
-            # unary operation expression
-            op = self.__advance()
-            self.__compile_term()
-            self.__output_vm_writer.write_arithmetic(CompilationEngine.__UNARY_OP_DICT[op])
-        elif self.__next_token_value_in({'('}):
-            # (
-            self.__advance()
-            self.__compile_expression()
-            # )
-            self.__advance()
 
     def __compile_expression_list(self) -> int:
         """
         Compiles a (possibly empty) comma-separated list of expressions.
         """
         args_counter = 0
-        if (self.__next_token_type_in({"integerConstant", "stringConstant",
-                                       "identifier"})) or (
-                self.__next_token_value_in({'('}.union(
-                    CompilationEngine.__KEYWORD_CONSTANT,
-                    set(CompilationEngine.__UNARY_OP_DICT.keys())))):
+        if self.__next_token_starts_term():
             self.__compile_expression()
             args_counter = 1
         # if number of expressions is greater than 1
-        while self.__next_token_value_in({','}):
+        while self.__peek[1] == ',':
             # ,
             self.__advance()
             self.__compile_expression()
@@ -324,16 +377,16 @@ class CompilationEngine:
     def __compile_subroutine_call(self) -> None:
         name = self.__advance()
         # if subroutine call
-        if self.__next_token_value_in({'.'}):
+        if self.__peek[1] == '.':
             n_args, precise_name = self.__write_precise_subroutine_name(name)
         else:
-            self.__output_vm_writer.write_push("pointer", 0)
+            self.__vm_push("pointer", 0)
             n_args = 1
-            precise_name = "{}.{}".format(self.__class_name, name)
+            precise_name = self.__qualify(self.__class_name, name)
         # (
         self.__advance()
         n_args += self.__compile_expression_list()
-        self.__output_vm_writer.write_call(precise_name, n_args)
+        self.__vm_call(precise_name, n_args)
         # )
         self.__advance()
 
@@ -342,104 +395,117 @@ class CompilationEngine:
         self.__advance()
         # subroutine name
         sub_name = self.__advance()
-        if (self.__symbol_table.current_symbol_table_contains(name)) or (
-                self.__symbol_table.class_level_symbol_table_contains(name)):
+        entry = self.__symbol_table.lookup(name)
+        if entry is not None:
             self.__write_push(name)
-            precise_name = "{}.{}".format(self.__symbol_table.type_of(name),
-                                          sub_name)
+            precise_name = self.__qualify(entry.type, sub_name)
             n_args = 1
         else:
-            precise_name = "{}.{}".format(name, sub_name)
+            precise_name = self.__qualify(name, sub_name)
             n_args = 0
         return n_args, precise_name
 
     def __compile_subroutine_body(self, function_type, cur_name) -> None:
         # {
         self.__advance()
-        while self.__next_token_value_in({"var"}):
+        while self.__peek[1] == "var":
             self.__compile_var_dec()
         n_locals = self.__symbol_table.subroutine_level_var_count("var")
-        self.__output_vm_writer.write_function(cur_name, n_locals)
+        self.__vm_function(cur_name, n_locals)
         self.__write_pointer_update(function_type)
-        self.__compile_statements()
+        if self.__next_tokens_return_var():
+            self.__write_return_var()
+        else:
+            self.__compile_statements()
         # }
         self.__advance()
         # update current symbol table
         self.__symbol_table.set_cur_level_symbol_table("class")
 
+    def __next_tokens_return_var(self) -> bool:
+        # the whole body is "return varName; }", as in most getters
+        next_token_tuple = self.__input_tokenizer.next_token_tuple
+        return self.__peek == ("keyword", "return") and (
+                next_token_tuple(1)[0] == "identifier") and (
+                next_token_tuple(2) == ("symbol", ';')) and (
+                next_token_tuple(3) == ("symbol", '}'))
+
+    def __write_return_var(self) -> None:
+        # return
+        self.__advance()
+        # var name
+        self.__write_push(self.__advance())
+        self.__vm_return()
+        # ;
+        self.__advance()
+
     def __write_integer_string_keyword_constant(self) -> None:
-        if self.__next_token_type_in({"integerConstant"}):
+        if self.__peek[0] == "integerConstant":
             # constant
             number = self.__advance()
-            self.__output_vm_writer.write_push("constant", number)
-        elif self.__next_token_type_in({"stringConstant"}):
+            self.__vm_push("constant", number)
+        elif self.__peek[0] == "stringConstant":
             # string
             string = self.__advance()
-            self.__output_vm_writer.write_push("constant", len(string))
-            self.__output_vm_writer.write_call("String.new", 1)
-            for char in string:
-                self.__output_vm_writer.write_push("constant", ord(char))
-                self.__output_vm_writer.write_call("String.appendChar",
-                                                   CompilationEngine.__ARGS)
+            self.__vm_string_constant(string)
         elif self.__next_token_value_in(CompilationEngine.__KEYWORD_CONSTANT):
             # keyword constant
             keyword_constant = self.__advance()
             if keyword_constant == "this":
-                self.__output_vm_writer.write_push("pointer", 0)
+                self.__vm_push("pointer", 0)
             else:
-                self.__output_vm_writer.write_push("constant", 0)
+                self.__vm_push("constant", 0)
                 # negate boolean
                 if keyword_constant == "true":
-                    self.__output_vm_writer.write_arithmetic("not")
+                    self.__vm_arithmetic("not")
 
     def __write_pointer_update(self, function_type) -> None:
         if function_type == "constructor":
             n_args = self.__symbol_table.class_level_var_count("field")
-            self.__output_vm_writer.write_push("constant", n_args)
-            self.__output_vm_writer.write_call("Memory.alloc", 1)
-            self.__output_vm_writer.write_pop("pointer", 0)
+            self.__vm_push("constant", n_args)
+            self.__vm_call("Memory.alloc", 1)
+            self.__vm_pop("pointer", 0)
         elif function_type == "method":
-            self.__output_vm_writer.write_push("argument", 0)
-            self.__output_vm_writer.write_pop("pointer", 0)
+            self.__vm_push("argument", 0)
+            self.__vm_pop("pointer", 0)
 
     def __write_identifier_term(self) -> None:
         # class name or var name
         name = self.__advance()
         # if varname[expression]
         is_array = self.__write_left_square_bracket(name)
-        if self.__next_token_value_in({'('}):
+        if self.__peek[1] == '(':
             n_args = 1
-            self.__output_vm_writer.write_push("pointer", 0)
+            self.__vm_push("pointer", 0)
             # (
             self.__advance()
             n_args += self.__compile_expression_list()
             # )
             self.__advance()
-            self.__output_vm_writer.write_call("{}.{}".format(self.__class_name, name), n_args)
+            self.__vm_call(self.__qualify(self.__class_name, name), n_args)
         # if subroutine call
         else:
             self.__write_period_and_array_end(is_array, name)
 
     def __write_period_and_array_end(self, is_array, name) -> None:
         precise_name = name
-        if self.__next_token_value_in({'.'}):
+        if self.__peek[1] == '.':
             n_args, precise_name = self.__write_precise_subroutine_name(name)
             # (
             self.__advance()
             n_args += self.__compile_expression_list()
             # )
             self.__advance()
-            self.__output_vm_writer.write_call(precise_name, n_args)
+            self.__vm_call(precise_name, n_args)
         else:
             if is_array:
-                self.__output_vm_writer.write_pop("pointer", 1)
-                self.__output_vm_writer.write_push("that", 0)
+                self.__write_array_load()
             else:
                 self.__write_push(precise_name)
 
     def __write_left_square_bracket(self, name: str) -> bool:
         is_array = False
-        if self.__next_token_value_in({'['}):
+        if self.__peek[1] == '[':
             is_array = True
             # [
             self.__advance()
@@ -447,31 +513,61 @@ class CompilationEngine:
             # ]
             self.__advance()
             self.__write_push(name)
-            self.__output_vm_writer.write_arithmetic("add")
+            self.__vm_arithmetic("add")
         return is_array
 
+    def __qualify(self, class_name: str, sub_name: str) -> str:
+        key = (class_name, sub_name)
+        qualified_name = self.__qualified_names.get(key)
+        if qualified_name is None:
+            qualified_name = class_name + "." + sub_name
+            self.__qualified_names[key] = qualified_name
+        return qualified_name
+
+    def __write_array_load(self) -> None:
+        # replaces the array entry address on the stack with its value
+        self.__vm_pop("pointer", 1)
+        self.__vm_push("that", 0)
+
+    def __write_array_store(self) -> None:
+        # stores the value on the stack in the array entry whose address is
+        # right below it
+        self.__vm_pop("temp", 0)
+        self.__vm_pop("pointer", 1)
+        self.__vm_push("temp", 0)
+        self.__vm_pop("that", 0)
+
+    @staticmethod
+    def __label(prefix: str, counter: int) -> str:
+        key = (prefix, counter)
+        label = CompilationEngine.__LABELS.get(key)
+        if label is None:
+            label = prefix + str(counter)
+            CompilationEngine.__LABELS[key] = label
+        return label
+
     def __advance(self) -> str:
-        return self.__input_tokenizer.advance()[1]
+        token_value = self.__input_tokenizer.advance()[1]
+        if self.__input_tokenizer.has_more_tokens():
+            self.__peek = self.__input_tokenizer.next_token_tuple()
+        return token_value
 
-    def __next_token_type_in(self, types_set) -> bool:
-        return self.__input_tokenizer.next_token_tuple()[0] in types_set
+    def __next_token_starts_term(self) -> bool:
+        token_type, token_value = self.__peek
+        return (token_type in CompilationEngine.__TERM_START_TYPES) or (
+                token_value in CompilationEngine.__TERM_START_VALUES)
 
     def __next_token_value_in(self, values_set) -> bool:
-        return self.__input_tokenizer.next_token_tuple()[1] in values_set
+        return self.__peek[1] in values_set
 
     def __write_pop_or_push(self, name, method) -> None:
-        kind = self.__symbol_table.kind_of(name)
-        if self.__symbol_table.current_symbol_table_contains(name):
-            if kind in CompilationEngine.__VAR_DICT1:
-                method(CompilationEngine.__VAR_DICT1[kind],
-                       self.__symbol_table.index_of(name))
-        else:
-            if kind in CompilationEngine.__VAR_DICT2:
-                method(CompilationEngine.__VAR_DICT2[kind],
-                       self.__symbol_table.index_of(name))
+        entry = self.__symbol_table.lookup(name)
+        if entry is not None:
+            method(CompilationEngine.__KIND_TO_SEGMENT[entry.kind],
+                   entry.index)
 
     def __write_pop(self, name) -> None:
-        self.__write_pop_or_push(name, self.__output_vm_writer.write_pop)
+        self.__write_pop_or_push(name, self.__vm_pop)
 
     def __write_push(self, name) -> None:
-        self.__write_pop_or_push(name, self.__output_vm_writer.write_push)
+        self.__write_pop_or_push(name, self.__vm_push)
@@ -1,3 +1,13 @@
+import typing
+
+
+class Entry(typing.NamedTuple):
+    """The information kept in the symbol table for a single identifier."""
+    type: str
+    kind: str
+    index: int
+
+
 class SymbolTable:
     """A symbol table that associates names with information needed for Jack
     compilation: type, kind and running index. The symbol table has two nested
@@ -9,12 +19,15 @@ class SymbolTable:
         self.__class_level_symbol_table = {}
         self.__subroutine_symbol_table = {}
         self.__cur_symbol_table = self.__class_level_symbol_table
-
-        self.__static_counter = 0
-        self.__field_counter = 0
-
-        self.__arg_counter = 0
-        self.__var_counter = 0
+        # entries already resolved in the current scope, by name
+        self.__lookup_cache = {}
+
+        # running index of every kind, and the table it is defined in
+        self.__counters = {"static": 0, "field": 0, "arg": 0, "var": 0}
+        self.__targets = {"static": self.__class_level_symbol_table,
+                          "field": self.__class_level_symbol_table,
+                          "arg": self.__cur_symbol_table,
+                          "var": self.__cur_symbol_table}
         self.__if_counter = 0
         self.__while_counter = 0
 
@@ -23,8 +36,9 @@ class SymbolTable:
         symbol table).
         """
         self.__subroutine_symbol_table[name] = {}
-        self.__arg_counter = 0
-        self.__var_counter = 0
+        self.__lookup_cache.clear()
+        self.__counters["arg"] = 0
+        self.__counters["var"] = 0
         self.__if_counter = 0
         self.__while_counter = 0
 
@@ -39,22 +53,10 @@ class SymbolTable:
             kind (str): the kind of the new identifier, can be:
             "STATIC", "FIELD", "ARG", "VAR".
         """
-        if kind == "static":
-            self.__class_level_symbol_table[name] = (
-                type, kind, self.__static_counter)
-            self.__static_counter += 1
-        elif kind == "field":
-            self.__class_level_symbol_table[name] = (
-                type, kind, self.__field_counter)
-            self.__field_counter += 1
-        elif kind == "arg":
-            self.__cur_symbol_table[name] = (
-                type, kind, self.__arg_counter)
-            self.__arg_counter += 1
-        elif kind == "var":
-            self.__cur_symbol_table[name] = (
-                type, kind, self.__var_counter)
-            self.__var_counter += 1
+        index = self.__counters[kind]
+        self.__targets[kind][name] = Entry(type, kind, index)
+        self.__counters[kind] = index + 1
+        self.__lookup_cache.pop(name, None)
 
     def subroutine_level_var_count(self, kind: str) -> int:
         """
@@ -65,18 +67,28 @@ class SymbolTable:
             int: the number of variables of the given kind already defined in
             the current scope.
         """
-        count = 0
-        for tpl in self.__cur_symbol_table.values():
-            if tpl[1] == kind:
-                count += 1
-        return count
+        return self.__counters[kind]
 
     def class_level_var_count(self, kind: str) -> int:
-        count = 0
-        for tpl in self.__class_level_symbol_table.values():
-            if tpl[1] == kind:
-                count += 1
-        return count
+        return self.__counters[kind]
+
+    def lookup(self, name: str):
+        """
+        Args:
+            name (str): name of an identifier.
+
+        Returns:
+            Entry: the entry of the named identifier in the current scope, or
+            None if the identifier is unknown.
+        """
+        try:
+            return self.__lookup_cache[name]
+        except KeyError:
+            entry = self.__cur_symbol_table.get(name)
+            if entry is None:
+                entry = self.__class_level_symbol_table.get(name)
+            self.__lookup_cache[name] = entry
+            return entry
 
     def kind_of(self, name: str):
         """
@@ -87,10 +99,9 @@ class SymbolTable:
             str: the kind of the named identifier in the current scope, or None
             if the identifier is unknown in the current scope.
         """
-        if name in self.__cur_symbol_table:
-            return self.__cur_symbol_table[name][1]
-        if name in self.__class_level_symbol_table:
-            return self.__class_level_symbol_table[name][1]
+        entry = self.lookup(name)
+        if entry is not None:
+            return entry.kind
 
     def type_of(self, name: str):
         """
@@ -100,10 +111,9 @@ class SymbolTable:
         Returns:
             str: the type of the named identifier in the current scope.
         """
-        if name in self.__cur_symbol_table:
-            return self.__cur_symbol_table[name][0]
-        if name in self.__class_level_symbol_table:
-            return self.__class_level_symbol_table[name][0]
+        entry = self.lookup(name)
+        if entry is not None:
+            return entry.type
 
     def index_of(self, name: str):
         """
@@ -113,10 +123,9 @@ class SymbolTable:
         Returns:
             int: the index assigned to the named identifier.
         """
-        if name in self.__cur_symbol_table:
-            return self.__cur_symbol_table[name][2]
-        if name in self.__class_level_symbol_table:
-            return self.__class_level_symbol_table[name][2]
+        entry = self.lookup(name)
+        if entry is not None:
+            return entry.index
 
     def get_if_counter(self) -> int:
         return self.__if_counter
@@ -135,6 +144,9 @@ class SymbolTable:
             self.__cur_symbol_table = self.__class_level_symbol_table
         else:
             self.__cur_symbol_table = self.__subroutine_symbol_table[name]
+        self.__targets["arg"] = self.__cur_symbol_table
+        self.__targets["var"] = self.__cur_symbol_table
+        self.__lookup_cache.clear()
 
     def current_symbol_table_contains(self, name: str) -> bool:
         return name in self.__cur_symbol_table
@@ -5,10 +5,14 @@ class VMWriter:
     """
     Writes VM commands into a file. Encapsulates the VM command syntax.
     """
+    # string forms of the small numbers most vm commands use
+    __NUMBER_STRINGS = {number: str(number) for number in range(256)}
 
     def __init__(self, output_stream: typing.TextIO) -> None:
         """Creates a new file and prepares it for writing VM commands."""
         self.__output_stream = output_stream
+        # vm commands, written to the output stream on flush
+        self.__buf = []
 
     def write_push(self, segment: str, index: int) -> None:
         """Writes a VM push command.
@@ -18,7 +22,8 @@ class VMWriter:
             "LOCAL", "STATIC", "THIS", "THAT", "POINTER", "TEMP"
             index (int): the index to push to.
         """
-        self.__output_stream.write("push {} {}\n".format(segment, index))
+        self.__buf.append("push " + segment + " " + (
+            VMWriter.__NUMBER_STRINGS.get(index) or str(index)) + "\n")
 
     def write_pop(self, segment: str, index: int) -> None:
         """Writes a VM pop command.
@@ -28,7 +33,8 @@ class VMWriter:
             "LOCAL", "STATIC", "THIS", "THAT", "POINTER", "TEMP".
             index (int): the index to pop from.
         """
-        self.__output_stream.write("pop {} {}\n".format(segment, index))
+        self.__buf.append("pop " + segment + " " + (
+            VMWriter.__NUMBER_STRINGS.get(index) or str(index)) + "\n")
 
     def write_arithmetic(self, command: str) -> None:
         """Writes a VM arithmetic command.
@@ -37,7 +43,7 @@ class VMWriter:
             command (str): the command to write, can be "ADD", "SUB", "NEG", 
             "EQ", "GT", "LT", "AND", "OR", "NOT", "SHIFTLEFT", "SHIFTRIGHT".
         """
-        self.__output_stream.write("{}\n".format(command))
+        self.__buf.append(command + "\n")
 
     def write_label(self, label: str) -> None:
         """Writes a VM label command.
@@ -45,7 +51,7 @@ class VMWriter:
         Args:
             label (str): the label to write.
         """
-        self.__output_stream.write("label {}\n".format(label))
+        self.__buf.append("label " + label + "\n")
 
     def write_goto(self, label: str) -> None:
         """Writes a VM goto command.
@@ -53,7 +59,7 @@ class VMWriter:
         Args:
             label (str): the label to go to.
         """
-        self.__output_stream.write("goto {}\n".format(label))
+        self.__buf.append("goto " + label + "\n")
 
     def write_if(self, label: str) -> None:
         """Writes a VM if-goto command.
@@ -61,7 +67,7 @@ class VMWriter:
         Args:
             label (str): the label to go to.
         """
-        self.__output_stream.write("if-goto {}\n".format(label))
+        self.__buf.append("if-goto " + label + "\n")
 
     def write_call(self, name: str, n_args: int) -> None:
         """Writes a VM call command.
@@ -70,7 +76,8 @@ class VMWriter:
             name (str): the name of the function to call.
             n_args (int): the number of arguments the function receives.
         """
-        self.__output_stream.write("call {} {}\n".format(name, n_args))
+        self.__buf.append("call " + name + " " + (
+            VMWriter.__NUMBER_STRINGS.get(n_args) or str(n_args)) + "\n")
 
     def write_function(self, name: str, n_locals: int) -> None:
         """Writes a VM function command.
@@ -79,8 +86,29 @@ class VMWriter:
             name (str): the name of the function.
             n_locals (int): the number of local variables the function uses.
         """
-        self.__output_stream.write("function {} {}\n".format(name, n_locals))
+        self.__buf.append("function " + name + " " + (
+            VMWriter.__NUMBER_STRINGS.get(n_locals) or str(n_locals)) + "\n")
+
+    def write_string_constant(self, string: str) -> None:
+        """Writes the VM commands that create a string constant, one
+        String.appendChar call per character.
+
+        Args:
+            string (str): the string constant to create.
+        """
+        numbers = VMWriter.__NUMBER_STRINGS
+        self.__buf.append("push constant " + (
+            numbers.get(len(string)) or str(len(string))) +
+            "\ncall String.new 1\n")
+        self.__buf.extend("push constant " + (
+            numbers.get(ord(char)) or str(ord(char))) +
+            "\ncall String.appendChar 2\n" for char in string)
 
     def write_return(self) -> None:
         """Writes a VM return command."""
-        self.__output_stream.write("return\n")
+        self.__buf.append("return\n")
+
+    def flush(self) -> None:
+        """Writes all the buffered VM commands to the output stream."""
+        self.__output_stream.write("".join(self.__buf))
+        self.__buf = []
@@ -3,9 +3,17 @@ class CompilationEngine:
     output stream.
     """
     # jack language and xml related
-    __BINARY_OP = {'+', '-', '*', '/', '&amp;', '|', '&lt;', '&gt;', '='}
-    __UNARY_OP = {'-', '~', '^', '#'}
-    __KEYWORD_CONSTANT = {"true", "false", "null", "this"}
+    __BINARY_OP = frozenset({'+', '-', '*', '/', '&amp;', '|', '&lt;', '&gt;',
+                             '='})
+    __UNARY_OP = frozenset({'-', '~', '^', '#'})
+    __KEYWORD_CONSTANT = frozenset({"true", "false", "null", "this"})
+    __CLASS_VAR_KINDS = frozenset({"static", "field"})
+    # tokens an expression can start with
+    __CONSTANT_TYPES = frozenset({"integerConstant", "stringConstant"})
+    __TERM_START_TYPES = __CONSTANT_TYPES | {"identifier"}
+    __TERM_START_VALUES = frozenset({'('}) | __KEYWORD_CONSTANT | __UNARY_OP
+    # tokens that make an identifier term more than a plain var name
+    __IDENTIFIER_TERM_FOLLOWERS = frozenset({'[', '(', '.'})
     # constants for readability of the code
     __INDENTATION_SPACES_AMOUNT = 2
     __ONE_TIME = 1
@@ -21,7 +29,12 @@ class CompilationEngine:
         """
         self.__input_tokenizer = input_stream
         self.__output_stream = output_stream
-        # for readability of the output file
+        # output lines, written to the output stream once the class is done
+        self.__buf = []
+        # for readability of the output file, indentation strings are cached
+        # by nesting depth
+        self.__depth = 0
+        self.__indentations = [""]
         self.__indentation = ""
         # for keeping track of opening and closing tags
         self.__tag_rules = []
@@ -31,6 +44,14 @@ class CompilationEngine:
                                              "while": self.__compile_while,
                                              "return": self.__compile_return,
                                              "if": self.__compile_if}
+        # dict of class body declarations and their correspondant compile
+        # methods
+        self.__class_body_compile_methods = {
+            "static": self.__compile_class_var_dec,
+            "field": self.__compile_class_var_dec,
+            "constructor": self.__compile_subroutine,
+            "method": self.__compile_subroutine,
+            "function": self.__compile_subroutine}
 
     def compile_class(self):
         """
@@ -39,23 +60,29 @@ class CompilationEngine:
         self.__write_non_terminal_opening_tag("class")
         # class -> class name -> {
         self.__advance_and_write_token(CompilationEngine.__THREE_TIMES)
-        if self.__next_token_value_in({"static", "field"}):
-            self.__compile_class_var_dec()
-        while self.__next_token_value_in({"constructor", "method", "function"}):
-            self.__compile_subroutine()
+        next_token_tuple = self.__input_tokenizer.next_token_tuple
+        compile_methods = self.__class_body_compile_methods
+        # class var declarations and subroutines, until the closing }
+        while True:
+            compile_method = compile_methods.get(next_token_tuple()[1])
+            if compile_method is None:
+                break
+            compile_method()
         # }
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
         self.__write_non_terminal_closing_tag()
+        self.__output_stream.write("".join(self.__buf))
+        self.__buf = []
 
     def __compile_class_var_dec(self):
         """
         Compiles a static declaration or a field declaration.
         """
-        while self.__next_token_value_in({"static", "field"}):
+        while self.__next_token_value_in(CompilationEngine.__CLASS_VAR_KINDS):
             self.__write_non_terminal_opening_tag("classVarDec")
             # static or field -> var type -> var name
             self.__advance_and_write_token(CompilationEngine.__THREE_TIMES)
-            while self.__next_token_value_in({','}):
+            while self.__peek_value() == ',':
                 # , -> var name
                 self.__advance_and_write_token(CompilationEngine.__TWO_TIMES)
             # ;
@@ -85,7 +112,7 @@ class CompilationEngine:
         enclosing "()".
         """
         self.__write_non_terminal_opening_tag("parameterList")
-        while not self.__next_token_value_in({')'}):
+        while self.__peek_value() != ')':
             # parameters in list
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
         self.__write_non_terminal_closing_tag()
@@ -97,7 +124,7 @@ class CompilationEngine:
         self.__write_non_terminal_opening_tag("varDec")
         # variable declaration's: var -> var type -> var name
         self.__advance_and_write_token(CompilationEngine.__THREE_TIMES)
-        while self.__next_token_value_in({','}):
+        while self.__peek_value() == ',':
             # , -> var name
             self.__advance_and_write_token(CompilationEngine.__TWO_TIMES)
         # ;
@@ -109,9 +136,14 @@ class CompilationEngine:
         Compiles a sequence of statements, not including the enclosing "{}".
         """
         self.__write_non_terminal_opening_tag("statements")
-        while self.__next_token_value_in({"do", "let", "while", "return", "if"}):
-            next_token_value = self.__input_tokenizer.next_token_tuple()[1]
-            self.__statements_compile_methods[next_token_value]()
+        next_token_tuple = self.__input_tokenizer.next_token_tuple
+        compile_methods = self.__statements_compile_methods
+        # peek once per statement and dispatch on the keyword
+        while True:
+            compile_method = compile_methods.get(next_token_tuple()[1])
+            if compile_method is None:
+                break
+            compile_method()
         self.__write_non_terminal_closing_tag()
 
     def __compile_do(self):
@@ -134,7 +166,7 @@ class CompilationEngine:
         # let -> var name
         self.__advance_and_write_token(CompilationEngine.__TWO_TIMES)
         # if varname[expression]
-        if self.__next_token_value_in({'['}):
+        if self.__peek_value() == '[':
             # [
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
             self.__compile_expression()
@@ -169,11 +201,7 @@ class CompilationEngine:
         self.__write_non_terminal_opening_tag("returnStatement")
         # return
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
-        while (self.__next_token_type_in({"integerConstant", "stringConstant",
-                                          "identifier"})) or (
-                self.__next_token_value_in({'('}.union(
-                    CompilationEngine.__KEYWORD_CONSTANT,
-                    CompilationEngine.__UNARY_OP))):
+        while self.__next_token_starts_term():
             self.__compile_expression()
         # ;
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
@@ -192,7 +220,7 @@ class CompilationEngine:
         self.__compile_statements()
         # } - end of body
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
-        if self.__next_token_value_in({"else"}):
+        if self.__peek_value() == "else":
             # else -> {
             self.__advance_and_write_token(CompilationEngine.__TWO_TIMES)
             self.__compile_statements()
@@ -205,11 +233,14 @@ class CompilationEngine:
         Compiles an expression.
         """
         self.__write_non_terminal_opening_tag("expression")
-        self.__compile_term()
-        while self.__next_token_value_in(CompilationEngine.__BINARY_OP):
+        next_token_tuple = self.__input_tokenizer.next_token_tuple
+        compile_term = self.__compile_term
+        binary_op = CompilationEngine.__BINARY_OP
+        compile_term()
+        while next_token_tuple()[1] in binary_op:
             # operation expression
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
-            self.__compile_term()
+            compile_term()
         self.__write_non_terminal_closing_tag()
 
     def __compile_term(self):
@@ -224,17 +255,25 @@ class CompilationEngine:
         token is not part of this term and should not be advanced over.
         """
         self.__write_non_terminal_opening_tag("term")
-        if (self.__next_token_type_in({"integerConstant", "stringConstant"})) or (
-                self.__next_token_value_in(CompilationEngine.__KEYWORD_CONSTANT)):
+        token_type, token_value = self.__input_tokenizer.next_token_tuple()
+        if (token_type in CompilationEngine.__CONSTANT_TYPES) or (
+                token_value in CompilationEngine.__KEYWORD_CONSTANT):
             # constant
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
-        elif self.__next_token_type_in({"identifier"}):
-            self.__write_identifier_term()
-        elif self.__next_token_value_in(CompilationEngine.__UNARY_OP):
+        elif token_type == "identifier":
+            if self.__input_tokenizer.next_token_tuple(1)[1] in \
+                    CompilationEngine.__IDENTIFIER_TERM_FOLLOWERS:
+                self.__write_identifier_term()
+            else:
+                # plain var name
+                self.__input_tokenizer.advance()
+                self.__buf.append(f"{self.__indentation}<identifier> "
+                                  f"{token_value} </identifier>\n")
+        elif token_value in CompilationEngine.__UNARY_OP:
             # unary operation expression
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
             self.__compile_term()
-        elif self.__next_token_value_in({'('}):
+        elif token_value == '(':
             # (
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
             self.__compile_expression()
@@ -247,14 +286,10 @@ class CompilationEngine:
         Compiles a (possibly empty) comma-separated list of expressions.
         """
         self.__write_non_terminal_opening_tag("expressionList")
-        if (self.__next_token_type_in({"integerConstant", "stringConstant",
-                                       "identifier"})) or (
-                self.__next_token_value_in({'('}.union(
-                    CompilationEngine.__KEYWORD_CONSTANT,
-                    CompilationEngine.__UNARY_OP))):
+        if self.__next_token_starts_term():
             self.__compile_expression()
         # if number of expressions is greater than 1
-        while self.__next_token_value_in({','}):
+        while self.__peek_value() == ',':
             # , - separating expressions
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
             self.__compile_expression()
@@ -264,7 +299,7 @@ class CompilationEngine:
         # class name or subroutine name or var name
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
         # if subroutine call
-        if self.__next_token_value_in({'.'}):
+        if self.__peek_value() == '.':
             # . -> subroutine name
             self.__advance_and_write_token(CompilationEngine.__TWO_TIMES)
         # (
@@ -277,7 +312,7 @@ class CompilationEngine:
         self.__write_non_terminal_opening_tag("subroutineBody")
         # { - beginning of body
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
-        while self.__next_token_value_in({"var"}):
+        while self.__peek_value() == "var":
             self.__compile_var_dec()
         self.__compile_statements()
         # } - end of body
@@ -285,38 +320,33 @@ class CompilationEngine:
         self.__write_non_terminal_closing_tag()
 
     def __write_non_terminal_opening_tag(self, tag_rule):
-        self.__output_stream.write("{}<{}>\n".format(
-            self.__indentation, tag_rule))
+        self.__buf.append(f"{self.__indentation}<{tag_rule}>\n")
         self.__tag_rules.append(tag_rule)
         self.__increase_indentation()
 
     def __write_non_terminal_closing_tag(self):
         self.__decrease_indentation()
-        self.__output_stream.write("{}</{}>\n".format(self.__indentation,
-                                                      self.__tag_rules.pop()))
-
-    def __write_terminal_tags_and_value(self, token_type, token_value):
-        self.__output_stream.write("{}<{}> {} </{}>\n".format(
-            self.__indentation, token_type, token_value, token_type))
+        self.__buf.append(
+            f"{self.__indentation}</{self.__tag_rules.pop()}>\n")
 
     def __write_identifier_term(self):
         # class name or var name
         self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
         # if varname[expression]
-        if self.__next_token_value_in({'['}):
+        if self.__peek_value() == '[':
             # [
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
             self.__compile_expression()
             # ]
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
-        if self.__next_token_value_in({'('}):
+        if self.__peek_value() == '(':
             # (
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
             self.__compile_expression_list()
             # )
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
         # if subroutine call
-        if self.__next_token_value_in({'.'}):
+        if self.__peek_value() == '.':
             # . -> subroutine name -> (
             self.__advance_and_write_token(CompilationEngine.__THREE_TIMES)
             self.__compile_expression_list()
@@ -324,20 +354,33 @@ class CompilationEngine:
             self.__advance_and_write_token(CompilationEngine.__ONE_TIME)
 
     def __advance_and_write_token(self, iterations):
+        advance = self.__input_tokenizer.advance
+        indentation = self.__indentation
+        append = self.__buf.append
         for i in range(iterations):
-            token_type, token_value = self.__input_tokenizer.advance()
-            self.__write_terminal_tags_and_value(token_type, token_value)
+            token_type, token_value = advance()
+            append(f"{indentation}<{token_type}> {token_value} "
+                   f"</{token_type}>\n")
+
+    def __peek_value(self):
+        return self.__input_tokenizer.next_token_tuple()[1]
+
+    def __next_token_starts_term(self):
+        token_type, token_value = self.__input_tokenizer.next_token_tuple()
+        return (token_type in CompilationEngine.__TERM_START_TYPES) or (
+                token_value in CompilationEngine.__TERM_START_VALUES)
 
     def __next_token_value_in(self, values_set):
         return self.__input_tokenizer.next_token_tuple()[1] in values_set
 
-    def __next_token_type_in(self, types_set):
-        return self.__input_tokenizer.next_token_tuple()[0] in types_set
-
     def __increase_indentation(self):
-        for i in range(CompilationEngine.__INDENTATION_SPACES_AMOUNT):
-            self.__indentation += " "
+        self.__depth += 1
+        if self.__depth == len(self.__indentations):
+            self.__indentations.append(
+                " " * CompilationEngine.__INDENTATION_SPACES_AMOUNT *
+                self.__depth)
+        self.__indentation = self.__indentations[self.__depth]
 
     def __decrease_indentation(self):
-        self.__indentation = \
-            self.__indentation[:-CompilationEngine.__INDENTATION_SPACES_AMOUNT]
+        self.__depth -= 1
+        self.__indentation = self.__indentations[self.__depth]
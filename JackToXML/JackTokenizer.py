@@ -92,16 +92,23 @@ class JackTokenizer:
                   "return"}
     __SYMBOLS = {'{', '}', '(', ')', '[', ']', '.', ',', ';', '+', '-', '*',
                  '/', '&', '<', '>', '=', '~', '|', '^', '#'}
-    __XML_DICT = {'<': '&lt;', '>': '&gt;', '&': '&amp;'}
+    __XML_TRANSLATION = str.maketrans({'<': '&lt;', '>': '&gt;', '&': '&amp;'})
     # for regex usage
     __INTEGER_RE = r'\d+'
     __STRING_RE = r'"[^"\n]*"'
     __IDENTIFIER_RE = r'[\w]+'
-    __KEYWORD_RE = r'{}(?!\w)'.format(r'(?!\w)|'.join(__KEYWORDS))
-    __SYMBOL_RE = '[{}]'.format('|'.join(re.escape(s) for s in __SYMBOLS))
-    __PATTERN = re.compile('|'.join([__KEYWORD_RE, __SYMBOL_RE,
-                                     __INTEGER_RE, __STRING_RE,
-                                     __IDENTIFIER_RE]))
+    __SYMBOL_RE = '[{}]'.format(''.join(re.escape(s)
+                                        for s in sorted(__SYMBOLS)))
+    # every alternative is a group named after the token type it matches,
+    # keywords are matched as identifiers and told apart by __KEYWORDS
+    __PATTERN = re.compile('|'.join([
+        '(?P<symbol>{})'.format(__SYMBOL_RE),
+        '(?P<integerConstant>{})'.format(__INTEGER_RE),
+        '(?P<stringConstant>{})'.format(__STRING_RE),
+        '(?P<identifier>{})'.format(__IDENTIFIER_RE)]))
+    # strings are matched too, so comment delimiters inside them are kept
+    __COMMENT_OR_STRING = re.compile(r'"[^"\n]*"|//[^\n]*\n?|/\*.*?\*/',
+                                     re.DOTALL)
 
     def __init__(self, input_stream: typing.TextIO) -> None:
         """Opens the input stream and gets ready to tokenize it.
@@ -111,62 +118,44 @@ class JackTokenizer:
         self.__input_file_str = input_stream.read()
         self.__remove_comments()
         self.__cur_token = ()
-        self.__tokens = self.__get_tokens()
+        self.__tokens = tuple(self.__get_tokens())
+        # index of the next token to be read
+        self.__pos = 0
 
     def advance(self) -> tuple:
         """Gets the next token from the input and makes it the current token.
         This method should be called if there are tokens left.
         Initially there is no current token.
         """
-        self.__cur_token = self.__tokens.pop(0)
+        self.__cur_token = self.__tokens[self.__pos]
+        self.__pos += 1
         return self.__cur_token
 
-    def next_token_tuple(self) -> tuple:
-        return self.__tokens[0]
+    def next_token_tuple(self, offset: int = 0) -> tuple:
+        """Returns the next token without advancing, or the token offset
+        places after it.
+        """
+        return self.__tokens[self.__pos + offset]
 
     def __remove_comments(self) -> None:
-        cur_idx = 0
-        comment_free_str = ''
-        while cur_idx < len(self.__input_file_str):
-            # add quotations to comment_free_str - ignore comments inside
-            if self.__input_file_str[cur_idx] == "\"":
-                quot_end = self.__input_file_str.find("\"", cur_idx + 1)
-                comment_free_str += self.__input_file_str[cur_idx:quot_end + 1]
-                cur_idx = quot_end + 1
-            # ignore comments and move to next characters in file
-            if self.__input_file_str[cur_idx:cur_idx + 2] == "//":
-                cur_idx = self.__input_file_str.find("\n", cur_idx + 1) + 1
-                comment_free_str += "\n"
-            elif self.__input_file_str[cur_idx:cur_idx + 2] == "/*":
-                cur_idx = self.__input_file_str.find("*/", cur_idx + 1) + 2
-                comment_free_str += "\n"
-            else:
-                comment_free_str += self.__input_file_str[cur_idx]
-                cur_idx += 1
-        self.__input_file_str = comment_free_str
-
-    def __get_tokens(self) -> list:
-        tokens = []
-        for word in JackTokenizer.__PATTERN.findall(
-                self.__input_file_str):
-            tokens.append(JackTokenizer.__type_and_value(word))
-        return tokens
-
-    @staticmethod
-    def __type_and_value(word) -> tuple:
-        if JackTokenizer.__word_matches_pattern(JackTokenizer.__INTEGER_RE, word):
-            return "integerConstant", word
-        if JackTokenizer.__word_matches_pattern(JackTokenizer.__STRING_RE, word):
-            return "stringConstant", word[1:-1]
-        if JackTokenizer.__word_matches_pattern(JackTokenizer.__KEYWORD_RE, word):
-            return "keyword", word
-        if JackTokenizer.__word_matches_pattern(JackTokenizer.__SYMBOL_RE, word):
-            xml_appropriate = word
-            if word in JackTokenizer.__XML_DICT.keys():
-                xml_appropriate = JackTokenizer.__XML_DICT[word]
-            return "symbol", xml_appropriate
-        return "identifier", word
+        self.__input_file_str = JackTokenizer.__COMMENT_OR_STRING.sub(
+            JackTokenizer.__comment_to_newline, self.__input_file_str)
 
     @staticmethod
-    def __word_matches_pattern(pattern, word):
-        return re.match(pattern, word) is not None
+    def __comment_to_newline(match) -> str:
+        # keep string constants as they are, replace comments with a newline
+        if match.group().startswith('"'):
+            return match.group()
+        return "\n"
+
+    def __get_tokens(self) -> typing.Iterator[tuple]:
+        for match in JackTokenizer.__PATTERN.finditer(self.__input_file_str):
+            token_type, word = match.lastgroup, match.group()
+            if token_type == "identifier":
+                if word in JackTokenizer.__KEYWORDS:
+                    token_type = "keyword"
+            elif token_type == "stringConstant":
+                word = word[1:-1]
+            elif token_type == "symbol":
+                word = word.translate(JackTokenizer.__XML_TRANSLATION)
+            yield token_type, word